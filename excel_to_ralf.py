@@ -6,7 +6,7 @@
 转换成 RALF 寄存器模型。
 
 依赖：
-    pip install pandas openpyxl
+    pip install -r requirements.txt
 
 用法示例：
     python excel_to_ralf.py \
@@ -16,200 +16,450 @@
 """
 
 import argparse
-from pathlib import Path
-
-import pandas as pd
+import io
+import re
+from functools import lru_cache
+from itertools import groupby, repeat
+from operator import attrgetter
+from typing import (
+    IO,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
+
+
+def sanitize(s: object) -> str:
+    """把 None 变成空串，其余转成 str（已是 str 的直接返回）。"""
+    if s is None:
+        return ""
+    return s if type(s) is str else str(s)
 
 
-def sanitize(s):
-    """把 NaN/None 变成空串，其余转成 str。"""
-    if pd.isna(s):
-        return ""
-    return str(s)
+# Bit 列格式："7:0" 或 "3"，冒号两侧允许空白
+_BIT_RE = re.compile(r"^\s*(\d+)\s*(?::\s*(\d+))?\s*$")
 
 
-def parse_bit_range(bit_str):
+def parse_bit_range(bit_str: object) -> Tuple[int, int]:
     """
     解析 Bit 字段，支持：
         "7:0" -> (7, 0)
         "3"   -> (3, 3)
+        3     -> (3, 3)   纯数字单元格由 load_excel 直接给出 int
     Bit 为空或非法时抛 ValueError，由调用方决定是否跳过。
     """
-    if pd.isna(bit_str):
+    if bit_str is None:
         raise ValueError("Bit 列为空")
+    if type(bit_str) is int:
+        return bit_str, bit_str
+    if not isinstance(bit_str, str):
+        bit_str = str(bit_str)
+
+    m = _BIT_RE.match(bit_str)
+    if m is None:
+        raise ValueError(f"Bit 列非法: {bit_str!r}")
+    hi = int(m.group(1))
+    lo_s = m.group(2)
+    return hi, (int(lo_s) if lo_s is not None else hi)
+
+
+@lru_cache(maxsize=4096)
+def _parse_int0(s: str) -> Optional[int]:
+    """int(s, 0) 的缓存版本，失败返回 None；ResetValue/RegOffset 取值高度重复。"""
+    try:
+        return int(s, 0)
+    except ValueError:
+        return None
+
 
-    bit_str = str(bit_str).strip()
-    if not bit_str:
-        raise ValueError("Bit 列为空字符串")
+# 寄存器不超过 64 位：按位宽预先算好掩码，小 reset 值预先算好 HEX 串
+_MASK = tuple((1 << w) - 1 for w in range(65))
+_HEX256 = tuple(format(i, "X") for i in range(256))
 
-    if ":" in bit_str:
-        hi_s, lo_s = bit_str.split(":", 1)
-        return int(hi_s), int(lo_s)
-    else:
-        b = int(bit_str)
-        return b, b
 
+@lru_cache(maxsize=4096)
+def _format_reset(width: int, rv_field: int) -> str:
+    """把已按位宽截断的 reset 值格式化为 WIDTH'hHEX，同一 (width, rv_field) 只格式化一次。"""
+    hex_s = _HEX256[rv_field] if rv_field < 256 else format(rv_field, "X")
+    return f"{width}'h{hex_s}"
 
-def parse_reset_value(rv_str):
+
+def parse_reset_value(rv_str: object) -> Optional[int]:
     """
     把 ResetValue 转成整数，用于合成寄存器 reset。
     支持 "0x1", "1", "0b1" 这种；失败返回 None。
     """
-    s = str(rv_str).strip()
+    if type(rv_str) is int:
+        return rv_str
+    s = sanitize(rv_str).strip()
     if not s:
         return None
-    try:
-        return int(s, 0)
-    except Exception:
-        return None
+    return _parse_int0(s)
+
+
+# Access 原始单元格值 -> 规范化后的访问类型；整表通常只有几种取值
+_ACC_CACHE: Dict[object, str] = {}
+
+
+def _norm_access(access: object) -> str:
+    """规范化 Access：去空白、转小写，空值默认 rw，只读 "r" 输出为 "ro"。"""
+    v = _ACC_CACHE.get(access)
+    if v is not None:
+        return v
+    v = sanitize(access).strip().lower() or "rw"
+    # 如果为只读 "r"，输出为 "ro" 以符合 RALF 访问类型习惯
+    if v == "r":
+        v = "ro"
+    _ACC_CACHE[access] = v
+    return v
+
+
+# FieldName 规范化（strip + lower）后落在此集合内的行不生成 field
+_SKIP_FNAME_LOWERED = frozenset(("", "reserved"))
+
+
+# 每个 field 整段一次 write 输出
+_FIELD_TPL_RESET = (
+    "        field {fn} @{lsb} {{\n"
+    "           bits {w};\n"
+    "           access {acc};\n"
+    "           reset {rst};\n"
+    "        }}\n"
+)
+_FIELD_TPL_NORESET = (
+    "        field {fn} @{lsb} {{\n"
+    "           bits {w};\n"
+    "           access {acc};\n"
+    "        }}\n"
+)
+
+
+REQUIRED_COLUMNS = [
+    "BlockName",
+    "RegName",
+    "RegOffset",
+    "Bit",
+    "FieldName",
+    "Access",
+    "ResetValue",
+    "Description",
+]
+
+
+class Row(NamedTuple):
+    """load_excel 产出的一行：REQUIRED_COLUMNS 顺序 + Hierarchy（列缺失时为 None）。"""
+
+    block: Any
+    reg: Any
+    offset: Any
+    bit: Any
+    fname: Any
+    access: Any
+    rv: Any
+    desc: Any
+    hier: Any
+
+
+def _cell_num(v: Any) -> Any:
+    """calamine 把数字单元格统一读成 float，整数值还原成 int（名称、位段、数值列都要过一遍）。"""
+    if type(v) is float and v.is_integer():
+        return int(v)
+    return v
+
+
+def load_excel(
+    path: str, sheet: Union[str, int], hierarchy: bool = True
+) -> Iterator[Row]:
+    """
+    用 python-calamine（Rust calamine）流式读取 Excel，返回逐行产出 Row 的迭代器。
 
+    打开文件、定位 sheet、校验表头在调用时立即完成，出错直接抛出，
+    以免调用方已打开（截断）输出文件后才发现输入有误；数据行随迭代流式读取。
+    hierarchy 为 False 时忽略 Hierarchy 列（Row.hier 恒为 None），输出不带实例路径的字段名。
+    """
+    # 延迟导入：--help 等不读 Excel 的路径无需加载 calamine
+    from python_calamine import CalamineWorkbook
 
-def load_excel(path, sheet):
-    df = pd.read_excel(path, sheet_name=sheet)
-    required = [
-        "BlockName",
-        "RegName",
-        "RegOffset",
-        "Bit",
-        "FieldName",
-        "Access",
-        "ResetValue",
-        "Description",
-    ]
-    missing = [c for c in required if c not in df.columns]
-    if missing:
-        raise ValueError(f"Excel 缺少列: {missing}")
-
-    # 关键修改：向下填充 BlockName/RegName/RegOffset/Hierarchy，
-    # 以支持只在首行填写，其余行留空的写法
-    for col in ["BlockName", "RegName", "RegOffset", "Hierarchy"]:
-        if col in df.columns:
-            df[col] = df[col].ffill()
-
-    return df
-
-
-def generate_ralf(df, bytes_per_word=4):
+    wb = CalamineWorkbook.from_path(path)
+    try:
+        if isinstance(sheet, str):
+            ws = wb.get_sheet_by_name(sheet)
+        else:
+            ws = wb.get_sheet_by_index(sheet)
+        row_iter = ws.iter_rows()
+
+        header = next(row_iter, [])
+        col_index = {name: i for i, name in enumerate(header) if name != ""}
+        missing = [c for c in REQUIRED_COLUMNS if c not in col_index]
+        if missing:
+            raise ValueError(f"Excel 缺少列: {missing}")
+    except BaseException:
+        wb.close()
+        raise
+
+    return _iter_rows(wb, row_iter, col_index, hierarchy)
+
+
+def _iter_rows(
+    wb: Any, row_iter: Iterator[List[Any]], col_index: Dict[Any, int], hierarchy: bool
+) -> Iterator[Row]:
+    """
+    逐行产出 Row，迭代结束后关闭 workbook。
+
+    向下填充 BlockName/RegName/RegOffset/Hierarchy 在读取循环中完成，
+    以支持只在首行填写，其余行留空的写法。calamine 的空单元格为 ""。
     """
-    根据 8 列格式生成符合目标风格的 RALF：
+    try:
+        i_block, i_reg, i_offset, i_bit, i_fname, i_acc, i_rv, i_desc = (
+            col_index[c] for c in REQUIRED_COLUMNS
+        )
+        i_hier = col_index.get("Hierarchy") if hierarchy else None
+        last_block: Any = ""
+        last_reg: Any = ""
+        last_offset: Any = ""
+        last_hier: Any = ""
+
+        for row in row_iter:
+            # 跳过整行为空的行
+            if all(v == "" for v in row):
+                continue
+
+            block = row[i_block]
+            if block == "":
+                block = last_block
+            else:
+                block = last_block = _cell_num(block)
+
+            reg = row[i_reg]
+            if reg == "":
+                reg = last_reg
+            else:
+                reg = last_reg = _cell_num(reg)
+
+            offset = row[i_offset]
+            if offset == "":
+                offset = last_offset
+            else:
+                offset = last_offset = _cell_num(offset)
+
+            hier = None
+            if i_hier is not None:
+                hier = row[i_hier]
+                if hier == "":
+                    hier = last_hier
+                else:
+                    hier = last_hier = _cell_num(hier)
+
+            # 向下填充后仍缺 BlockName/RegName/RegOffset 的行（如首个 block 之前的行）
+            # 无法归属到寄存器，直接跳过；不把缺失的 offset 当成 0，以免与真实 @'h0 寄存器重叠
+            if block == "" or reg == "" or offset == "":
+                continue
+
+            yield Row(
+                block,
+                reg,
+                offset,
+                _cell_num(row[i_bit]),
+                _cell_num(row[i_fname]),
+                row[i_acc],
+                _cell_num(row[i_rv]),
+                row[i_desc],
+                hier,
+            )
+    finally:
+        wb.close()
+
+
+def _write_block(
+    block: object,
+    rows: Iterable[Row],
+    w: Callable[[str], Any],
+    bytes_per_word: int,
+) -> None:
+    """
+    输出单个 block：
 
     block <BlockName> {
       bytes 4;
       register REGNAME @'hOFFSET { ... }
     }
-    """
-    lines = []
-    first_block = True
-
-    # 按 BlockName 分组
-    for block_name, block_df in df.groupby("BlockName", sort=False):
-        block_name = sanitize(block_name) or "TOP"
-
-        # 针对当前 block 读取 Hierarchy 列（如果存在），取该 block 中第一行的值
-        # 生成供 field 名称使用的后门前缀，例如：`PRCM_hierarchyU_apb_slvtop.slvif.ff_regb_ddrc_ch0_lpddr5
-        hierarchy_macro = ""
-        hierarchy_inst = ""
-        if "Hierarchy" in block_df.columns:
-            first_h = sanitize(block_df["Hierarchy"].iloc[0])
-            if first_h:
-                hierarchy_macro = f"`{block_name}_hierarchy{first_h}"
-                hierarchy_inst = first_h
-
-        if not first_block:
-            lines.append("")
-        first_block = False
 
+    block 内的行已按寄存器连续排列，因此单次线性扫描，
+    在 (RegName, RegOffset) 变化时输出寄存器头尾即可，无需 groupby。
+    """
     # block 头部 + bytes 行（例如：block DWC_ddrctl_axi_0_AXI_Port0_block {\n  bytes 4;）
-        lines.append(f"block {block_name} {{")
-        lines.append(f"  bytes {bytes_per_word};")
-
-    # 在 block 内按 (RegName, RegOffset) 分寄存器
-        for (reg_name, offset), reg_df in block_df.groupby(
-            ["RegName", "RegOffset"], sort=False
-        ):
-            reg_name = sanitize(reg_name)
-            offset = sanitize(offset)
+    w(f"block {sanitize(block) or 'TOP'} {{\n")
+    w(f"  bytes {bytes_per_word};\n")
+
+    prev_reg_key = None
+    for _, reg, offset, bit, fname, access, rv, desc, hierarchy in rows:
+        # 在 block 内按 (RegName, RegOffset) 分寄存器
+        reg_key = (reg, offset)
+        if reg_key != prev_reg_key:
+            if prev_reg_key is not None:
+                w("    }\n\n")
+            prev_reg_key = reg_key
 
             # 解析 offset 为整数，再转为不带 0x 的 hex，用于 @'hXXX
-            try:
-                offset_int = int(str(offset).strip(), 0)
-            except Exception:
-                offset_int = 0
+            offset_int: Optional[int]
+            if type(offset) is int:
+                offset_int = offset
+            else:
+                offset_int = _parse_int0(sanitize(offset).strip())
+                if offset_int is None:
+                    offset_int = 0
             offset_hex = format(offset_int, "X")  # 不带 0x 的大写 HEX
 
             # 输出寄存器头
-            lines.append(f"    register {reg_name} @'h{offset_hex} {{")
-
-            # 为该寄存器生成字段
-            for _, row in reg_df.iterrows():
-                base_fname = sanitize(row["FieldName"])
-                fname = base_fname
-                if not fname:
-                    continue
-
-                # 如果字段名为 reserved（忽略大小写），则不生成该 field
-                if base_fname.strip().lower() == "reserved":
-                    continue
-
-                bit_raw = row["Bit"]
-                try:
-                    hi, lo = parse_bit_range(bit_raw)
-                except ValueError:
-                    # Bit 非法或为空，不生成该 field
-                    continue
-
-                width = hi - lo + 1
-                lsb = lo
-
-                faccess = str(row["Access"]).strip() or "rw"
-                faccess = faccess.lower()
-                # 如果为只读 "r"，输出为 "ro" 以符合 RALF 访问类型习惯
-                if faccess == "r":
-                    faccess = "ro"
-
-                # reset: 使用 WIDTH'hHEX 形式
-                rv_int = parse_reset_value(row["ResetValue"])
-                reset_str = None
-                if rv_int is not None:
-                    # 对当前 field 的 reset 按位宽截断
-                    mask = (1 << width) - 1
-                    rv_field = rv_int & mask
-                    reset_str = f"{width}'h{rv_field:X}"
-
-                # 如果存在 Hierarchy 信息，则将 field 名扩展为
-                #   field <原始字段名> (<Hierarchy 实例路径>) @<lsb> {
-                # 例如：field lpddr5 (U_apb_slvtop.slvif.ff_regb_ddrc_ch0_lpddr5) @3 {
-                if "Hierarchy" in reg_df.columns:
-                    h_val = sanitize(row["Hierarchy"])
-                    if h_val:
-                        fname = f"{base_fname} ({h_val})"
-
-                lines.append(f"        field {fname} @{lsb} {{")
-                lines.append(f"           bits {width};")
-                lines.append(f"           access {faccess};")
-                if reset_str is not None:
-                    lines.append(f"           reset {reset_str};")
-                lines.append("        }")
-
-            lines.append("    }")
-            lines.append("")
-
-        lines.append("}")
-
-    return "\n".join(lines)
-
-
-def main():
+            w(f"    register {sanitize(reg)} @'h{offset_hex} {{\n")
+
+        # 为该寄存器生成字段
+        # 字段名为空或为 reserved（忽略大小写）时不生成该 field
+        base_fname = sanitize(fname)
+        if base_fname.strip().lower() in _SKIP_FNAME_LOWERED:
+            continue
+
+        try:
+            hi, lo = parse_bit_range(bit)
+        except ValueError:
+            # Bit 非法或为空，不生成该 field
+            continue
+
+        width = hi - lo + 1
+
+        faccess = _norm_access(access)
+
+        # 如果存在 Hierarchy 信息，则将 field 名扩展为
+        #   field <原始字段名> (<Hierarchy 实例路径>) @<lsb> {
+        # 例如：field lpddr5 (U_apb_slvtop.slvif.ff_regb_ddrc_ch0_lpddr5) @3 {
+        h_val = sanitize(hierarchy)
+        if h_val:
+            base_fname = f"{base_fname} ({h_val})"
+
+        # reset: 使用 WIDTH'hHEX 形式
+        rv_int = parse_reset_value(rv)
+        if rv_int is not None:
+            # 对当前 field 的 reset 按位宽截断；超出查表范围的位宽现算
+            mask = _MASK[width] if 0 <= width <= 64 else (1 << width) - 1
+            w(
+                _FIELD_TPL_RESET.format(
+                    fn=base_fname,
+                    lsb=lo,
+                    w=width,
+                    acc=faccess,
+                    rst=_format_reset(width, rv_int & mask),
+                )
+            )
+        else:
+            w(
+                _FIELD_TPL_NORESET.format(
+                    fn=base_fname, lsb=lo, w=width, acc=faccess
+                )
+            )
+
+    if prev_reg_key is not None:
+        w("    }\n\n")
+    w("}\n")
+
+
+def _gen_block(block: object, rows: List[Row], bytes_per_word: int) -> str:
+    """在子进程中生成单个 block 的 RALF 文本。"""
+    buf = io.StringIO()
+    _write_block(block, rows, buf.write, bytes_per_word)
+    return buf.getvalue()
+
+
+def generate_ralf(
+    row_iter: Iterable[Row],
+    out_fp: Optional[IO[str]] = None,
+    bytes_per_word: int = 4,
+    jobs: int = 1,
+) -> Optional[str]:
+    """
+    根据 load_excel 产出的行元组生成 RALF，写入 out_fp；
+    out_fp 为 None 时写入 io.StringIO 并以字符串返回整份 RALF。
+
+    行先按 (BlockName, RegName, RegOffset) 的首次出现顺序做一次稳定排序，
+    使同一 block/寄存器的行连续（表中不相邻的同名行也会归到一起），
+    之后只需比较相邻行即可判断分组切换。各 block 相互独立：
+    jobs == 1 时逐个 block 直接写入 out_fp；否则用进程池并行生成
+    各 block 文本，再按原顺序写出（jobs <= 0 表示使用全部 CPU）。
+    """
+    if out_fp is None:
+        buf = io.StringIO()
+        generate_ralf(row_iter, buf, bytes_per_word, jobs)
+        return buf.getvalue()
+
+    rows = list(row_iter)
+    block_rank: Dict[object, int] = {}
+    reg_rank: Dict[Tuple[object, object, object], int] = {}
+    for row in rows:
+        if row.block not in block_rank:
+            block_rank[row.block] = len(block_rank)
+        reg_key = (row.block, row.reg, row.offset)
+        if reg_key not in reg_rank:
+            reg_rank[reg_key] = len(reg_rank)
+    rows.sort(
+        key=lambda r: (block_rank[r.block], reg_rank[(r.block, r.reg, r.offset)])
+    )
+
+    w = out_fp.write
+    if jobs == 1 or len(block_rank) <= 1:
+        for i, (block, block_rows) in enumerate(groupby(rows, attrgetter("block"))):
+            # block 之间空一行
+            if i:
+                w("\n")
+            _write_block(block, block_rows, w, bytes_per_word)
+        return None
+
+    # 仅并行时才导入，串行路径不承担 concurrent.futures/multiprocessing 的导入开销
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=jobs if jobs > 0 else None) as ex:
+        groups = [(block, list(g)) for block, g in groupby(rows, attrgetter("block"))]
+        chunks = ex.map(
+            _gen_block,
+            [block for block, _ in groups],
+            [g for _, g in groups],
+            repeat(bytes_per_word),
+        )
+        for i, chunk in enumerate(chunks):
+            if i:
+                w("\n")
+            w(chunk)
+    return None
+
+
+def main() -> None:
     p = argparse.ArgumentParser(description="Excel -> RALF converter")
     p.add_argument("--excel", required=True, help="输入 Excel 文件路径")
     p.add_argument("--sheet", default=0, help="Sheet 名称或索引，默认 0")
     p.add_argument("--out", required=True, help="输出 RALF 文件路径")
     p.add_argument("--bytes", type=int, default=4, help="block bytes 属性，默认 4")
+    p.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="并行生成 block 的进程数，默认 1（不并行），0 表示使用全部 CPU",
+    )
+    p.add_argument(
+        "--no-hierarchy",
+        action="store_true",
+        help="忽略 Hierarchy 列，field 名不附加实例路径",
+    )
     args = p.parse_args()
 
-    df = load_excel(args.excel, args.sheet)
-    ralf_text = generate_ralf(df, bytes_per_word=args.bytes)
-    Path(args.out).write_text(ralf_text, encoding="utf-8")
+    rows = load_excel(args.excel, args.sheet, hierarchy=not args.no_hierarchy)
+    # 1 MiB 写缓冲，摊薄逐行 write 的系统调用开销
+    with open(args.out, "w", encoding="utf-8", buffering=1 << 20) as fp:
+        generate_ralf(rows, fp, bytes_per_word=args.bytes, jobs=args.jobs)
     print(f"生成 RALF: {args.out}")
 
 
@@ -0,0 +1,30 @@
+"""
+安装 excel_to_ralf 模块：
+
+    pip install .
+
+可选：设置 EXCEL2RALF_MYPYC=1 时用 mypyc 把 excel_to_ralf.py 编译成 C 扩展，
+加速逐行生成 RALF 的主循环（需要 mypy 和 C 编译器）：
+
+    pip install mypy
+    EXCEL2RALF_MYPYC=1 python setup.py build_ext --inplace
+
+编译产物（.so/.pyd）与 excel_to_ralf.py 同目录时，`import excel_to_ralf` 会优先加载编译版本。
+"""
+
+import os
+
+from setuptools import setup
+
+ext_modules = []
+if os.environ.get("EXCEL2RALF_MYPYC") == "1":
+    from mypyc.build import mypycify
+
+    ext_modules = mypycify(["--ignore-missing-imports", "excel_to_ralf.py"])
+
+setup(
+    name="excel2ralf",
+    py_modules=["excel_to_ralf"],
+    install_requires=["python-calamine>=0.8"],
+    ext_modules=ext_modules,
+)
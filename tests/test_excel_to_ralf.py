@@ -0,0 +1,178 @@
+import sys
+from pathlib import Path
+
+import openpyxl
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import excel_to_ralf  # noqa: E402
+
+HEADER = [
+    "BlockName",
+    "RegName",
+    "RegOffset",
+    "Bit",
+    "FieldName",
+    "Access",
+    "ResetValue",
+    "Description",
+    "Hierarchy",
+]
+
+# 覆盖：向下填充（含 Hierarchy）、不相邻同一 block/寄存器合并、reserved/空字段名跳过、
+# 空 Access -> rw、r -> ro、reset 按位宽截断
+ROWS = [
+    ["TOP", "CTRL", "0x0", 0, "enable", "RW", 1, "", "u_top.ctrl"],
+    [None, None, None, "7:4", "mode", "r", "0xFF", "", None],
+    [None, None, None, "9:8", "Reserved", "rw", "0", "", None],
+    [None, None, None, "10", None, "rw", "0", "", None],
+    ["AUX", "CFG", "0x4", "3:0", "cfg", None, None, "", "u_aux"],
+    ["TOP", "CTRL", "0x0", 11, "late", "wo", "0b1", "", "u_top.ctrl"],
+    [None, "STAT", 8, "31:0", "status", "r", "0xFFFFFFFF", "", None],
+]
+
+EXPECTED = """\
+block TOP {
+  bytes 4;
+    register CTRL @'h0 {
+        field enable (u_top.ctrl) @0 {
+           bits 1;
+           access rw;
+           reset 1'h1;
+        }
+        field mode (u_top.ctrl) @4 {
+           bits 4;
+           access ro;
+           reset 4'hF;
+        }
+        field late (u_top.ctrl) @11 {
+           bits 1;
+           access wo;
+           reset 1'h1;
+        }
+    }
+
+    register STAT @'h8 {
+        field status (u_top.ctrl) @0 {
+           bits 32;
+           access ro;
+           reset 32'hFFFFFFFF;
+        }
+    }
+
+}
+
+block AUX {
+  bytes 4;
+    register CFG @'h4 {
+        field cfg (u_aux) @0 {
+           bits 4;
+           access rw;
+        }
+    }
+
+}
+"""
+
+
+def _write_xlsx(path, header, rows):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "Sheet1"
+    ws.append(header)
+    for row in rows:
+        ws.append(row)
+    wb.save(path)
+
+
+def _run_main(monkeypatch, *argv):
+    monkeypatch.setattr(sys, "argv", ["excel_to_ralf.py", *argv])
+    excel_to_ralf.main()
+
+
+@pytest.fixture
+def regs_xlsx(tmp_path):
+    xlsx = tmp_path / "regs.xlsx"
+    _write_xlsx(xlsx, HEADER, ROWS)
+    return xlsx
+
+
+@pytest.mark.parametrize("jobs", ["1", "2"])
+def test_golden_output(regs_xlsx, tmp_path, monkeypatch, jobs):
+    out = tmp_path / "regs.ralf"
+    _run_main(
+        monkeypatch, "--excel", str(regs_xlsx), "--out", str(out), "--jobs", jobs
+    )
+    assert out.read_text(encoding="utf-8") == EXPECTED
+
+
+def test_no_hierarchy(regs_xlsx, tmp_path, monkeypatch):
+    out = tmp_path / "regs.ralf"
+    _run_main(
+        monkeypatch, "--excel", str(regs_xlsx), "--out", str(out), "--no-hierarchy"
+    )
+    expected = EXPECTED.replace(" (u_top.ctrl)", "").replace(" (u_aux)", "")
+    assert out.read_text(encoding="utf-8") == expected
+
+
+def test_generate_ralf_returns_text(regs_xlsx):
+    rows = excel_to_ralf.load_excel(str(regs_xlsx), "Sheet1")
+    assert excel_to_ralf.generate_ralf(rows) == EXPECTED
+
+
+def test_missing_workbook_keeps_existing_output(tmp_path, monkeypatch):
+    out = tmp_path / "regs.ralf"
+    out.write_text("KEEP", encoding="utf-8")
+
+    with pytest.raises(OSError):
+        _run_main(
+            monkeypatch, "--excel", str(tmp_path / "nope.xlsx"), "--out", str(out)
+        )
+
+    assert out.read_text(encoding="utf-8") == "KEEP"
+
+
+def test_missing_columns_keeps_existing_output(tmp_path, monkeypatch):
+    xlsx = tmp_path / "bad.xlsx"
+    _write_xlsx(xlsx, ["BlockName", "RegName"], [["TOP", "CTRL"]])
+
+    out = tmp_path / "regs.ralf"
+    out.write_text("KEEP", encoding="utf-8")
+
+    with pytest.raises(ValueError, match="Excel 缺少列"):
+        _run_main(monkeypatch, "--excel", str(xlsx), "--out", str(out))
+
+    assert out.read_text(encoding="utf-8") == "KEEP"
+
+
+def test_numeric_name_cells(tmp_path):
+    xlsx = tmp_path / "numeric.xlsx"
+    _write_xlsx(xlsx, HEADER, [[1, 100, 16, 0, 5, "rw", 1, "", 7]])
+
+    text = excel_to_ralf.generate_ralf(excel_to_ralf.load_excel(str(xlsx), "Sheet1"))
+
+    assert "block 1 {" in text
+    assert "register 100 @'h10 {" in text
+    assert "field 5 (7) @0 {" in text
+    assert ".0" not in text
+
+
+def test_rows_without_block_reg_or_offset_are_skipped(tmp_path):
+    xlsx = tmp_path / "gaps.xlsx"
+    _write_xlsx(
+        xlsx,
+        HEADER,
+        [
+            [None, "EARLY", "0x0", 0, "early", "rw", None, "", None],
+            ["TOP", "CTRL", "0x0", 0, "enable", "rw", None, "", None],
+        ],
+    )
+    text = excel_to_ralf.generate_ralf(excel_to_ralf.load_excel(str(xlsx), "Sheet1"))
+    assert "EARLY" not in text
+    assert text.startswith("block TOP {\n  bytes 4;\n    register CTRL @'h0 {\n")
+
+    xlsx = tmp_path / "nooffset.xlsx"
+    _write_xlsx(xlsx, HEADER, [["TOP", "R", None, 0, "f", "rw", None, "", None]])
+    text = excel_to_ralf.generate_ralf(excel_to_ralf.load_excel(str(xlsx), "Sheet1"))
+    assert text == ""